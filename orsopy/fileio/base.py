@@ -14,6 +14,7 @@ from collections.abc import Mapping
 from contextlib import contextmanager
 from copy import deepcopy
 from enum import Enum
+from functools import lru_cache
 from inspect import isclass
 from typing import Any, Dict, Generator, List, Optional, TextIO, Tuple, Union
 
@@ -55,6 +56,10 @@ class ORSOSchemaWarning(RuntimeWarning):
 class Header:
     """
     The super class for all the items in the orso module.
+
+    Subclasses do not define __slots__ on purpose. Entries in a file that are
+    not part of the schema and user supplied attributes are stored on the instance
+    and serialized from its __dict__.
     """
 
     _orso_optionals: List[str] = []
@@ -91,17 +96,16 @@ class Header:
         constructor but applied after instance generation.
         """
         construct_dict = {}
-        construct_fields = fields(cls)
-        field_keys = [fi.name for fi in construct_fields]
+        field_types = {fi.name: fi.type for fi in fields(cls)}
         user_dict = {}
 
         for key, value in data_dict.items():
-            if key in field_keys:
-                ftype = construct_fields[field_keys.index(key)].type
+            if key in field_types:
+                ftype = field_types[key]
                 # convert dictionary to Header derived class if possible
                 if type(ftype) is type and type(value) is dict and issubclass(ftype, Header):
                     # the field requires a ORSO Header type
-                    value = construct_fields[field_keys.index(key)].type.from_dict(value)
+                    value = ftype.from_dict(value)
                 construct_dict[key] = value
             else:
                 user_dict[key] = value
@@ -141,6 +145,9 @@ class Header:
 
         if hasattr(self, "unit"):
             self._check_unit(self.unit)
+            if isinstance(self.unit, str):
+                # only a few distinct units exist, share one string object for each
+                self.unit = sys.intern(self.unit)
 
     @property
     def user_data(self):
@@ -459,7 +466,7 @@ class Header:
 
         :raises: ValueError is the unit is not ASCII text.
         """
-        if unit is not None:
+        if unit is not None and not unit.isascii():
             # raise UnicodeError if not ascii
             unit.encode("ascii")
 
@@ -497,6 +504,15 @@ class Header:
         return out
 
 
+# use the libyaml C parser if PyYAML was built with it
+try:
+    _SafeLoader = yaml.CSafeLoader
+except AttributeError:
+    _SafeLoader = yaml.SafeLoader
+
+
+# The python emitter is needed for output, as the libyaml emitter
+# does not use Emitter.process_tag and would write explicit tags.
 class OrsoDumper(yaml.SafeDumper):
     def represent_data(self, data):
         if hasattr(data, "yaml_representer"):
@@ -512,6 +528,63 @@ class OrsoDumper(yaml.SafeDumper):
 
 
 unit_registry = None
+_unit_factors: Dict[Tuple[str, str], Optional[float]] = {}
+_unit_factors_registry = None
+
+
+def _get_unit_registry():
+    """
+    Return the pint unit registry, creating it on first use.
+
+    Cached conversion factors are dropped if the registry has been replaced.
+    """
+    global unit_registry, _unit_factors_registry
+    if unit_registry is None:
+        import pint
+
+        unit_registry = pint.UnitRegistry()
+    if unit_registry is not _unit_factors_registry:
+        _unit_factors.clear()
+        _unit_factors_registry = unit_registry
+    return unit_registry
+
+
+def _unit_factor(unit: str, output_unit: str) -> Optional[float]:
+    """
+    Multiplicative factor to convert a magnitude from one unit to another.
+
+    The conversion is evaluated by pint the first time a pair of units is
+    requested, later calls just look up the stored factor.
+
+    :param unit: Unit of the magnitude.
+    :param output_unit: Unit to convert to.
+
+    :return: Factor to multiply the magnitude with or None, if the
+        conversion involves an offset (e.g. K to degC).
+    """
+    registry = _get_unit_registry()
+    key = (unit, output_unit)
+    try:
+        return _unit_factors[key]
+    except KeyError:
+        pass
+
+    factor = (1.0 * registry(unit)).to(output_unit).magnitude
+    if (0.0 * registry(unit)).to(output_unit).magnitude != 0.0:
+        # offset units can't be converted by a factor alone
+        factor = None
+    _unit_factors[key] = factor
+    return factor
+
+
+def _convert_unit(magnitude, unit: str, output_unit: str):
+    """
+    Convert a magnitude from one unit to another, using the cached factor when possible.
+    """
+    factor = _unit_factor(unit, output_unit)
+    if factor is None:
+        return (magnitude * _get_unit_registry()(unit)).to(output_unit).magnitude
+    return magnitude * factor
 
 
 @dataclass
@@ -591,21 +664,27 @@ class Value(Header):
         output = output.replace("unit=", "")
         return output
 
+    def __eq__(self, other):
+        # values are often shared between objects after resolving defaults
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.magnitude, self.unit, self.error, self.offset, self.comment) == (
+            other.magnitude,
+            other.unit,
+            other.error,
+            other.offset,
+            other.comment,
+        )
+
     def as_unit(self, output_unit):
         """
         Returns the value as converted to the given unit.
         """
         if output_unit == self.unit:
             return self.magnitude
-
-        global unit_registry
-        if unit_registry is None:
-            import pint
-
-            unit_registry = pint.UnitRegistry()
-
-        val = self.magnitude * unit_registry(self.unit)
-        return val.to(output_unit).magnitude
+        return _convert_unit(self.magnitude, self.unit, output_unit)
 
 
 @dataclass
@@ -631,6 +710,19 @@ class ComplexValue(Header):
         output = output.replace("unit=", "")
         return output
 
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.real, self.imag, self.unit, self.error, self.comment) == (
+            other.real,
+            other.imag,
+            other.unit,
+            other.error,
+            other.comment,
+        )
+
     def as_unit(self, output_unit):
         """
         Returns the complex value as converted to the given unit.
@@ -641,15 +733,7 @@ class ComplexValue(Header):
             value = self.real + 1j * self.imag
         if output_unit == self.unit:
             return value
-
-        global unit_registry
-        if unit_registry is None:
-            import pint
-
-            unit_registry = pint.UnitRegistry()
-
-        val = value * unit_registry(self.unit)
-        return val.to(output_unit).magnitude
+        return _convert_unit(value, self.unit, output_unit)
 
 
 @dataclass
@@ -683,16 +767,7 @@ class ValueRange(Header):
         """
         if output_unit == self.unit:
             return (self.min, self.max)
-
-        global unit_registry
-        if unit_registry is None:
-            import pint
-
-            unit_registry = pint.UnitRegistry()
-
-        vmin = self.min * unit_registry(self.unit)
-        vmax = self.max * unit_registry(self.unit)
-        return (vmin.to(output_unit).magnitude, vmax.to(output_unit).magnitude)
+        return (_convert_unit(self.min, self.unit, output_unit), _convert_unit(self.max, self.unit, output_unit))
 
 
 @dataclass
@@ -724,17 +799,7 @@ class ValueVector(Header):
         """
         if output_unit == self.unit:
             return (self.x, self.y, self.z)
-
-        global unit_registry
-        if unit_registry is None:
-            import pint
-
-            unit_registry = pint.UnitRegistry()
-
-        vx = self.x * unit_registry(self.unit)
-        vy = self.y * unit_registry(self.unit)
-        vz = self.z * unit_registry(self.unit)
-        return (vx.to(output_unit).magnitude, vy.to(output_unit).magnitude, vz.to(output_unit).magnitude)
+        return tuple(_convert_unit(vi, self.unit, output_unit) for vi in (self.x, self.y, self.z))
 
 
 @dataclass
@@ -862,15 +927,43 @@ class File(Header):
         """
         Header.__post_init__(self)
         if self.timestamp is None:
-            fname = pathlib.Path(self.file)
-            if fname.exists():
-                self.timestamp = datetime.datetime.fromtimestamp(fname.stat().st_mtime)
+            # a single stat call, a missing or inaccessible file leaves the timestamp empty
+            try:
+                mtime = pathlib.Path(self.file).stat().st_mtime
+            except (OSError, ValueError):
+                pass
+            else:
+                self.timestamp = datetime.datetime.fromtimestamp(mtime)
 
 
 class NotOrsoCompatibleFileError(ValueError):
     pass
 
 
+ORSO_MAGIC_PATTERN = re.compile(
+    r"^(# ORSO reflectivity data file \| ([0-9]+\.?[0-9]*|\.[0-9]+)"
+    r" standard \| YAML encoding \| https://www\.reflectometry\.org/)$"
+)
+ORSO_VERSION_PATTERN = re.compile(r"([0-9]+\.?[0-9]*|\.[0-9]+)+?")
+
+
+def _parse_data_lines(lines: List[str]) -> np.ndarray:
+    """
+    Convert the numerical lines of one dataset to a (rows, columns) array.
+
+    All lines are parsed in one go, only if the lines do not form a regular
+    table they get converted one by one.
+    """
+    if len(lines) > 0:
+        ncols = len(lines[0].split())
+        # the total size alone can't detect ragged lines that happen to add up
+        if all(len(line.split()) == ncols for line in lines):
+            values = np.fromstring("".join(lines), dtype=float, sep=" ")
+            if values.size == len(lines) * ncols:
+                return values.reshape(len(lines), ncols)
+    return np.array([np.fromstring(v, dtype=float, sep=" ") for v in lines])
+
+
 def _read_header_data(file: Union[TextIO, str], validate: bool = False) -> Tuple[List[dict], list, str]:
     """
     Reads the header and data contained within an ORSO file, parsing it into
@@ -913,8 +1006,7 @@ def _read_header_data(file: Union[TextIO, str], validate: bool = False) -> Tuple
                 # a new dataset is starting. Complete the previous dataset's
                 # numerical array  and start collecting the numbers for this
                 # dataset
-                _d = np.array([np.fromstring(v, dtype=float, sep=" ") for v in _ds_lines])
-                data.append(_d)
+                data.append(_parse_data_lines(_ds_lines))
                 _ds_lines = []
 
                 # append '---' to signify the start of a new yaml document
@@ -926,22 +1018,16 @@ def _read_header_data(file: Union[TextIO, str], validate: bool = False) -> Tuple
                 header.append(line[1:])
 
         # append the last numerical array
-        _d = np.array([np.fromstring(v, dtype=float, sep=" ") for v in _ds_lines])
-        data.append(_d)
+        data.append(_parse_data_lines(_ds_lines))
 
         yml = "".join(header)
 
         # first line of an ORSO file should have the magic string
-        pattern = re.compile(
-            r"^(# ORSO reflectivity data file \| ([0-9]+\.?[0-9]*|\.[0-9]+)"
-            r" standard \| YAML encoding \| https://www\.reflectometry\.org/)$"
-        )
-
-        if len(header) < 1 or not pattern.match(header[0].lstrip(" ")):
+        if len(header) < 1 or not ORSO_MAGIC_PATTERN.match(header[0].lstrip(" ")):
             raise NotOrsoCompatibleFileError("First line does not appear to match that of an ORSO file")
-        version = re.findall(r"([0-9]+\.?[0-9]*|\.[0-9]+)+?", header[0])[0]
+        version = ORSO_VERSION_PATTERN.findall(header[0])[0]
 
-        dcts = yaml.safe_load_all(yml)
+        dcts = yaml.load_all(yml, Loader=_SafeLoader)
 
         # synthesise json dicts for each dataset from the first dataset, and
         # updates to the yaml.
@@ -972,19 +1058,44 @@ def _validate_header_data(dct_list: List[dict]):
     :raises ValueError: When the units for columns :code:`'Qz'` and
         :code:`'sQz'` are not the same.
     """
-    import jsonschema
+    from jsonschema.exceptions import best_match
 
     vi = sys.version_info
     if vi.minor < 7:
         warnings.warn("Validation not possible with Python 3.6 with 2020-12 json schema", ORSOSchemaWarning)
 
+    validator = _refl_header_validator()
+    for dct in dct_list:
+        # same error reporting as jsonschema.validate
+        error = best_match(validator.iter_errors(dct))
+        if error is not None:
+            raise error
+
+
+@lru_cache(maxsize=1)
+def _load_refl_schema() -> dict:
+    """
+    Load the ORSO reflectivity header json schema shipped with orsopy.
+
+    The schema does not change at runtime, so the file is only parsed once.
+    """
     pth = os.path.dirname(__file__)
     schema_pth = os.path.join(pth, "schema", "refl_header.schema.json")
     with open(schema_pth, "r") as f:
-        schema = json.load(f)
+        return json.load(f)
 
-    for dct in dct_list:
-        jsonschema.validate(dct, schema)
+
+@lru_cache(maxsize=1)
+def _refl_header_validator():
+    """
+    Validator for the ORSO header schema, checked and created once per process.
+    """
+    from jsonschema.validators import validator_for
+
+    schema = _load_refl_schema()
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
 
 
 @contextmanager
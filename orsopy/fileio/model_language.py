@@ -4,10 +4,12 @@ Implementation of the simplified model language for the ORSO header.
 It includes parsing of models from header or different input information and
 resolving the model to a simple list of slabs.
 """
+import sys
 import warnings
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Union
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from ..utils.chemical_formula import Formula
 from ..utils.density_resolver import DensityResolver
@@ -16,13 +18,75 @@ from .base import ComplexValue, Header, Value
 DENSITY_RESOLVERS: List[DensityResolver] = []
 
 
-def find_idx(string, start, value):
-    res = string[start:].find(value)
-    if res >= 0:
-        next_idx = start + res
+class _DensityNotFound(ValueError):
+    pass
+
+
+def _lookup_density_by_formula(formula: str) -> Tuple[float, str]:
+    """
+    Query the density resolvers for a chemical formula string.
+
+    Returns the number density in 1/nm³ together with a comment on the origin of the data.
+    Successful lookups are cached for the current list of resolvers, failed ones get
+    queried again on the next call.
+    """
+    if len(DENSITY_RESOLVERS) == 0:
+        from ..utils.resolver_slddb import ResolverSLDDB
+
+        DENSITY_RESOLVERS.append(ResolverSLDDB())
+
+    try:
+        return _resolve_density(formula, tuple(DENSITY_RESOLVERS))
+    except _DensityNotFound:
+        return 0.0, "could not locate density information for material"
+
+
+@lru_cache(maxsize=512)
+def _resolve_density(formula: str, resolvers: Tuple[DensityResolver, ...]) -> Tuple[float, str]:
+    """
+    Resolve the density of a formula with the given resolvers, raises _DensityNotFound if none finds it.
+
+    Errors when parsing the formula are raised as they are.
+    """
+    parsed_formula = Formula(formula)
+    # first search for formula itself
+    for ri in resolvers:
+        try:
+            dens = ri.resolve_formula(parsed_formula)
+        except ValueError:
+            pass
+        else:
+            return dens, ri.comment
+    # mix elemental density to approximate alloys
+    for ri in resolvers:
+        try:
+            dens = ri.resolve_elemental(parsed_formula)
+        except ValueError:
+            pass
+        else:
+            return dens, ri.comment
+    raise _DensityNotFound(f"could not locate density information for {formula}")
+
+
+@lru_cache(maxsize=4096)
+def _formula_sld(formula: str, mass_density=None, number_density=None, xray_energy=None) -> complex:
+    """
+    Calculate the SLD of a chemical formula from its mass density (g/cm³) or number density (1/Å³).
+
+    Neutron SLD is returned if no x-ray energy is given.
+    Results are cached as the same materials get evaluated many times.
+    """
+    from orsopy.slddb.material import Material, get_element
+
+    elements = [(get_element(element), amount) for element, amount in Formula(formula)]
+    if mass_density is not None:
+        material = Material(elements, dens=mass_density)
+    else:
+        material = Material(elements, fu_dens=number_density)
+    if xray_energy is None:
+        return material.rho_n
     else:
-        next_idx = len(string)
-    return next_idx
+        return material.rho_of_E(xray_energy)
 
 
 @dataclass
@@ -45,76 +109,60 @@ class Material(Header):
     relative_density: Optional[float] = None
 
     original_name = None
+    # attributes that get the default unit from ModelParameters and the types that carry a unit
+    _default_units = (
+        ("mass_density", "mass_density_unit", Value),
+        ("number_density", "number_density_unit", Value),
+        ("sld", "sld_unit", (Value, ComplexValue)),
+        ("magnetic_moment", "magnetic_moment_unit", Value),
+    )
 
     def __post_init__(self):
         super().__post_init__()
+        if isinstance(self.formula, str):
+            # formula strings are used for comparison and as cache keys
+            self.formula = sys.intern(self.formula)
+
+    def _identity_key(self):
+        return (
+            self.formula,
+            self.mass_density,
+            self.number_density,
+            self.sld,
+            self.magnetic_moment,
+            self.relative_density,
+            self.comment,
+        )
+
+    def __eq__(self, other):
+        # materials are shared between repeated layers, avoid comparing them attribute by attribute
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._identity_key() == other._identity_key()
 
     def resolve_defaults(self, defaults: ModelParameters):
         if self.formula is None and self.sld is None:
             if self.original_name is None:
                 raise ValueError("Material has to either define sld or formula")
             else:
-                self.formula = self.original_name
-        if self.mass_density is not None:
-            if isinstance(self.mass_density, Value) and self.mass_density.unit is None:
-                self.mass_density.unit = defaults.mass_density_unit
-            elif not isinstance(self.mass_density, Value):
-                self.mass_density = Value(self.mass_density, unit=defaults.mass_density_unit)
-        if self.number_density is not None:
-            if isinstance(self.number_density, Value) and self.number_density.unit is None:
-                self.number_density.unit = defaults.number_density_unit
-            elif not isinstance(self.number_density, Value):
-                self.number_density = Value(self.number_density, unit=defaults.number_density_unit)
-        if self.sld is not None:
-            if isinstance(self.sld, (Value, ComplexValue)) and self.sld.unit is None:
-                self.sld.unit = defaults.sld_unit
-            elif not isinstance(self.sld, (Value, ComplexValue)):
-                self.sld = Value(self.sld, unit=defaults.sld_unit)
-        if self.magnetic_moment is not None:
-            if isinstance(self.magnetic_moment, Value) and self.magnetic_moment.unit is None:
-                self.magnetic_moment.unit = defaults.magnetic_moment_unit
-            elif not isinstance(self.magnetic_moment, Value):
-                self.magnetic_moment = Value(self.magnetic_moment, unit=defaults.magnetic_moment_unit)
+                self.formula = sys.intern(self.original_name)
+        for name, unit_name, types in self._default_units:
+            value = getattr(self, name)
+            if value is None:
+                continue
+            if not isinstance(value, types):
+                setattr(self, name, Value(value, unit=getattr(defaults, unit_name)))
+            elif value.unit is None:
+                value.unit = getattr(defaults, unit_name)
 
     def generate_density(self):
         if self.sld is not None or self.mass_density is not None or self.number_density is not None:
             # this material already contains density information
             return
-        if len(DENSITY_RESOLVERS) == 0:
-            from ..utils.resolver_slddb import ResolverSLDDB
-
-            DENSITY_RESOLVERS.append(ResolverSLDDB())
-
-        if self.formula in CACHED_MATERIALS:
-            self.number_density = CACHED_MATERIALS[self.formula][0]
-            self.comment = CACHED_MATERIALS[self.formula][1]
-            return
-
-        formula = Formula(self.formula)
-        # first search for formula itself
-        for ri in DENSITY_RESOLVERS:
-            try:
-                dens = ri.resolve_formula(formula)
-            except ValueError:
-                pass
-            else:
-                self.number_density = Value(magnitude=dens, unit="1/nm^3")
-                self.comment = ri.comment
-                CACHED_MATERIALS[self.formula] = (self.number_density, ri.comment)
-                return
-        # mix elemental density to approximate alloys
-        for ri in DENSITY_RESOLVERS:
-            try:
-                dens = ri.resolve_elemental(formula)
-            except ValueError:
-                pass
-            else:
-                self.number_density = Value(magnitude=dens, unit="1/nm^3")
-                self.comment = ri.comment
-                CACHED_MATERIALS[self.formula] = (self.number_density, ri.comment)
-                return
-        self.number_density = Value(magnitude=0.0, unit="1/nm^3")
-        self.comment = "could not locate density information for material"
+        dens, self.comment = _lookup_density_by_formula(self.formula)
+        self.number_density = Value(magnitude=dens, unit="1/nm^3")
 
     def get_sld(self, xray_energy=None) -> complex:
         if self.relative_density is None:
@@ -124,31 +172,51 @@ class Material(Header):
         if self.sld is not None:
             return rel * self.sld.as_unit("1/angstrom^2") + 0j
 
-        from orsopy.slddb.material import Material, get_element
-
-        formula = Formula(self.formula)
         if self.mass_density is not None:
-            material = Material(
-                [(get_element(element), amount) for element, amount in formula],
-                dens=self.mass_density.as_unit("g/cm^3"),
+            return rel * _formula_sld(
+                self.formula, mass_density=self.mass_density.as_unit("g/cm^3"), xray_energy=xray_energy
             )
-            if xray_energy is None:
-                return rel * material.rho_n
-            else:
-                return rel * material.rho_of_E(xray_energy)
         elif self.number_density is not None:
-            material = Material(
-                [(get_element(element), amount) for element, amount in formula],
-                fu_dens=self.number_density.as_unit("1/angstrom^3"),
+            return rel * _formula_sld(
+                self.formula, number_density=self.number_density.as_unit("1/angstrom^3"), xray_energy=xray_energy
             )
-            if xray_energy is None:
-                return rel * material.rho_n
-            else:
-                return rel * material.rho_of_E(xray_energy)
         else:
             return 0.0j
 
 
+def _resolve_composition(composition, resolvable_items):
+    """
+    Map each composition key to a named item, a special material or a new material from the formula.
+    """
+    get_item = resolvable_items.get
+    get_special = SPECIAL_MATERIALS.get
+    output = {}
+    for key in composition:
+        material = get_item(key)
+        if material is None:
+            material = get_special(key)
+        if material is None:
+            material = Material(formula=key)
+        output[key] = material
+    return output
+
+
+def _mix_composition(composition, composition_materials):
+    """
+    Create a material with the SLD of the resolved materials mixed by the current composition fractions.
+    """
+    sld = 0.0
+    for key, fraction in composition.items():
+        mi = composition_materials[key]
+        mi.generate_density()
+        sld += fraction * mi.get_sld()
+    mix_str = ";".join([f"{value}x{key}" for key, value in composition.items()])
+    return Material(
+        sld=ComplexValue(real=sld.real, imag=sld.imag, unit="1/angstrom^2"),
+        comment=f"composition material: {mix_str}",
+    )
+
+
 @dataclass
 class Composit(Header):
     composition: Dict[str, float]
@@ -156,15 +224,7 @@ class Composit(Header):
     original_name = None
 
     def resolve_names(self, resolvable_items):
-        self._composition_materials = {}
-        for key, value in self.composition.items():
-            if key in resolvable_items:
-                material = resolvable_items[key]
-            elif key in SPECIAL_MATERIALS:
-                material = SPECIAL_MATERIALS[key]
-            else:
-                material = Material(formula=key)
-            self._composition_materials[key] = material
+        self._composition_materials = _resolve_composition(self.composition, resolvable_items)
 
     def resolve_defaults(self, defaults: ModelParameters):
         for mat in self._composition_materials.values():
@@ -174,17 +234,7 @@ class Composit(Header):
         """
         Create a material based on the composition attribute.
         """
-        sld = 0.0
-        for key, value in self.composition.items():
-            mi = self._composition_materials[key]
-            mi.generate_density()
-            sldi = mi.get_sld()
-            sld += value * sldi
-        mix_str = ";".join([f"{value}x{key}" for key, value in self.composition.items()])
-        self.material = Material(
-            sld=ComplexValue(real=sld.real, imag=sld.imag, unit="1/angstrom^2"),
-            comment=f"composition material: {mix_str}",
-        )
+        self.material = _mix_composition(self.composition, self._composition_materials)
 
     def get_sld(self, xray_energy=None):
         return self.material.get_sld(xray_energy=xray_energy)
@@ -196,8 +246,6 @@ SPECIAL_MATERIALS = {
     "water": Material(formula="H2O", mass_density=Value(1.0, unit="g/cm^3")),
 }
 
-CACHED_MATERIALS = {}
-
 
 @dataclass
 class Layer(Header):
@@ -227,20 +275,13 @@ class Layer(Header):
                     self.material = Material(formula=self.material)
                 else:
                     self.material = possible_material
-            elif self.material in SPECIAL_MATERIALS:
-                self.material = SPECIAL_MATERIALS[self.material]
             else:
-                self.material = Material(formula=self.material)
+                material = SPECIAL_MATERIALS.get(self.material)
+                if material is None:
+                    material = Material(formula=self.material)
+                self.material = material
         elif self.composition:
-            self._composition_materials = {}
-            for key, value in self.composition.items():
-                if key in resolvable_items:
-                    material = resolvable_items[key]
-                elif key in SPECIAL_MATERIALS:
-                    material = SPECIAL_MATERIALS[key]
-                else:
-                    material = Material(formula=key)
-                self._composition_materials[key] = material
+            self._composition_materials = _resolve_composition(self.composition, resolvable_items)
         else:
             self.material = Material(formula=self.original_name)
 
@@ -269,17 +310,90 @@ class Layer(Header):
         """
         Create a material based on the composition attribute.
         """
-        sld = 0.0
-        for key, value in self.composition.items():
-            mi = self._composition_materials[key]
-            mi.generate_density()
-            sldi = mi.get_sld()
-            sld += value * sldi
-        mix_str = ";".join([f"{value}x{key}" for key, value in self.composition.items()])
-        self.material = Material(
-            sld=ComplexValue(real=sld.real, imag=sld.imag, unit="1/angstrom^2"),
-            comment=f"composition material: {mix_str}",
-        )
+        self.material = _mix_composition(self.composition, self._composition_materials)
+
+
+@lru_cache(maxsize=256)
+def _parse_stack(stack: str) -> Tuple[Tuple[str, str, Union[int, float]], ...]:
+    """
+    Split a stack string into its items.
+
+    Each item is a tuple ("sub_stack", stack, repetitions) for a repeated block
+    or ("layer", name, thickness) for a single layer. The result is cached by
+    stack string, as the same stacks get resolved repeatedly.
+    """
+    output = []
+    for token in _split_stack(stack):
+        token = token.strip()
+        if not token:
+            continue
+        if "(" in token:
+            rep, sub_stack = token.split("(", 1)
+            sub_stack = sub_stack.rsplit(")", 1)[0]
+            output.append(("sub_stack", sub_stack.strip(), int(rep)))
+        else:
+            items = token.rsplit(None, 1)
+            if len(items) == 2:
+                thickness = float(items[1])
+            else:
+                thickness = 0.0
+            output.append(("layer", items[0], thickness))
+    return tuple(output)
+
+
+def _split_stack(stack: str) -> List[str]:
+    """
+    Split a stack string at the "|" separators that are not within brackets.
+    """
+    if "(" not in stack:
+        return stack.split("|")
+    tokens = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(stack):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            tokens.append(stack[start:i])
+            start = i + 1
+    tokens.append(stack[start:])
+    return tokens
+
+
+def _create_stack_item(kind, name, number, resolvable_items):
+    """
+    Create the object for one item returned by _parse_stack.
+    """
+    if kind == "sub_stack":
+        return SubStack(repetitions=number, stack=name)
+    if name in resolvable_items:
+        obj = resolvable_items[name]
+        if isinstance(obj, Material) or isinstance(obj, Composit):
+            obj = Layer(material=obj, thickness=number)
+        elif getattr(obj, "thickness", "ignore") is None:
+            obj.thickness = number
+    else:
+        obj = Layer(material=name, thickness=number)
+        obj.original_name = name
+    return obj
+
+
+def _expand_layers(sequence):
+    """
+    Flatten a sequence of layers and sub-stacks into a list of layers with generated materials.
+    """
+    layers = []
+    for item in sequence:
+        if isinstance(item, Layer):
+            if item.material is None:
+                item.generate_material()
+            item.material.generate_density()
+            layers.append(item)
+        else:
+            layers.extend(item.resolve_to_layers())
+    return layers
 
 
 @dataclass
@@ -297,38 +411,12 @@ class SubStack(Header):
         if self.stack is None and self.sequence is None:
             raise ValueError("SubStack has to either define stack or sequence")
         if self.sequence is None:
-            stack = self.stack
             output = []
-            idx = 0
-            while idx < len(stack):
-                next_idx = find_idx(stack, idx, "|")
-                if "(" in stack[idx:next_idx]:
-                    close_idx = find_idx(stack, idx, ")")
-                    next_idx = find_idx(stack, close_idx, "|")
-                    rep, sub_stack = stack[idx:close_idx].split("(", 1)
-                    rep = int(rep)
-                    obj = SubStack(repetitions=rep, stack=sub_stack.strip())
-                else:
-                    items = stack[idx:next_idx].strip().rsplit(None, 1)
-                    item = items[0].strip()
-                    if len(items) == 2:
-                        thickness = float(items[1])
-                    else:
-                        thickness = 0.0
-
-                    if item in resolvable_items:
-                        obj = resolvable_items[item]
-                        if isinstance(obj, Material) or isinstance(obj, Composit):
-                            obj = Layer(material=obj, thickness=thickness)
-                        elif getattr(obj, "thickness", "ignore") is None:
-                            obj.thickness = thickness
-                    else:
-                        obj = Layer(material=item, thickness=thickness)
-                        obj.original_name = item
+            for kind, name, number in _parse_stack(self.stack):
+                obj = _create_stack_item(kind, name, number, resolvable_items)
                 if hasattr(obj, "resolve_names"):
                     obj.resolve_names(resolvable_items)
                 output.append(obj)
-                idx = next_idx + 1
             self.sequence = output
         else:
             for li in self.sequence:
@@ -340,19 +428,7 @@ class SubStack(Header):
                 li.resolve_defaults(defaults)
 
     def resolve_to_layers(self):
-        layers = list(self.sequence)
-        added = 0
-        for i in range(len(layers)):
-            if isinstance(layers[i + added], Layer):
-                if layers[i + added].material is None:
-                    layers[i + added].generate_material()
-                layers[i + added].material.generate_density()
-            else:
-                obj = layers.pop(i + added)
-                sub_layers = obj.resolve_to_layers()
-                layers = layers[: i + added] + sub_layers + layers[i + added :]
-                added += len(sub_layers) - 1
-        return layers * self.repetitions
+        return _expand_layers(self.sequence) * self.repetitions
 
 
 @dataclass
@@ -403,54 +479,16 @@ class SampleModel(Header):
             defaults = ModelParameters()
         else:
             defaults = self.globals
-        stack = self.stack
         ri = self.resolvable_items
         output = []
-        idx = 0
-        while idx < len(stack):
-            next_idx = find_idx(stack, idx, "|")
-            if "(" in stack[idx:next_idx]:
-                close_idx = find_idx(stack, idx, ")")
-                next_idx = find_idx(stack, close_idx, "|")
-                rep, sub_stack = stack[idx:close_idx].split("(", 1)
-                rep = int(rep)
-                obj = SubStack(repetitions=rep, stack=sub_stack.strip())
-            else:
-                items = stack[idx:next_idx].strip().rsplit(None, 1)
-                item = items[0].strip()
-                if len(items) == 2:
-                    thickness = float(items[1])
-                else:
-                    thickness = 0.0
-
-                if item in ri:
-                    obj = ri[item]
-                    if isinstance(obj, Material) or isinstance(obj, Composit):
-                        obj = Layer(material=obj, thickness=thickness)
-                    elif getattr(obj, "thickness", "ignore") is None:
-                        obj.thickness = thickness
-                else:
-                    obj = Layer(material=item, thickness=thickness)
-                    obj.original_name = item
+        for kind, name, number in _parse_stack(self.stack):
+            obj = _create_stack_item(kind, name, number, ri)
             if hasattr(obj, "resolve_names"):
                 obj.resolve_names(ri)
             if hasattr(obj, "resolve_defaults"):
                 obj.resolve_defaults(defaults)
             output.append(obj)
-            idx = next_idx + 1
         return output
 
     def resolve_to_layers(self):
-        layers = self.resolve_stack()
-        added = 0
-        for i in range(len(layers)):
-            if isinstance(layers[i + added], Layer):
-                if layers[i + added].material is None:
-                    layers[i + added].generate_material()
-                layers[i + added].material.generate_density()
-            else:
-                obj = layers.pop(i + added)
-                sub_layers = obj.resolve_to_layers()
-                layers = layers[: i + added] + sub_layers + layers[i + added :]
-                added += len(sub_layers) - 1
-        return layers
+        return _expand_layers(self.resolve_stack())
@@ -2,6 +2,8 @@
 Implementation of the top level class for the ORSO header.
 """
 
+import pickle
+
 from dataclasses import dataclass
 from typing import BinaryIO, List, Optional, Sequence, TextIO, Union
 
@@ -41,6 +43,7 @@ class Orso(Header):
     data_set: Optional[Union[int, str]] = None
 
     __repr__ = Header._staggered_repr
+    _empty_pickle = None
 
     def __init__(
         self,
@@ -67,9 +70,12 @@ class Orso(Header):
 
         :return: Empty Orso class, within minimum required columns
         """
-        res = super(Orso, cls).empty()
-        res.columns = [Column("Qz", "1/angstrom"), Column("R")]
-        return res
+        if cls._empty_pickle is None:
+            res = super(Orso, cls).empty()
+            res.columns = [Column("Qz", "1/angstrom"), Column("R")]
+            cls._empty_pickle = pickle.dumps(res, protocol=pickle.HIGHEST_PROTOCOL)
+        # unpickling the stored instance is much faster than building the tree of Header objects
+        return pickle.loads(cls._empty_pickle)
 
     def column_header(self) -> str:
         """
@@ -323,9 +329,35 @@ def load_nexus(fname: Union[str, BinaryIO]) -> List[OrsoDataset]:
     return [_from_nexus_group(g) for g in root.values() if g.attrs.get("ORSO_class", None) == "OrsoDataset"]
 
 
-def save_nexus(datasets: List[OrsoDataset], fname: Union[str, BinaryIO], comment: Optional[str] = None) -> BinaryIO:
+def save_nexus(
+    datasets: List[OrsoDataset],
+    fname: Union[str, BinaryIO],
+    comment: Optional[str] = None,
+    compression: Optional[str] = None,
+) -> BinaryIO:
+    """
+    Saves an ORSO binary (NeXus/HDF5) file. Each of the datasets must have a unique
+    :py:attr:`OrsoDataset.info.data_set` attribute. If that attribute is not
+    set, it is given an integer value corresponding to it's position
+    in the list.
+
+    :param datasets: List of OrsoDataset to save into the Orso file.
+    :param fname: The file name to save to.
+    :param comment: Comment to write at the top of Orso file.
+    :param compression: Optional HDF5 compression filter for the data columns (e.g. :code:`'gzip'`).
+        Compressed columns are written chunked and byte shuffled, by default they are stored contiguous.
+
+    :raises ValueError: If the :py:attr:`OrsoDataset.info.data_set`
+        values are not unique.
+    """
     import h5py
 
+    if compression is None:
+        column_options = {}
+    else:
+        # h5py picks the chunk size for compressed datasets
+        column_options = {"compression": compression, "shuffle": True, "chunks": True}
+
     h5py.get_config().track_order = True
 
     for idx, dataset in enumerate(datasets):
@@ -363,7 +395,7 @@ def save_nexus(datasets: List[OrsoDataset], fname: Union[str, BinaryIO], comment
             for column_index, column in enumerate(info.columns):
                 # assume that dataset.data has dimension == ncolumns along first dimension
                 # (note that this is not how data would be loaded from e.g. load_orso, which is row-first)
-                col_data = data_group.create_dataset(column.name, data=dsi.data[:, column_index])
+                col_data = data_group.create_dataset(column.name, data=dsi.data[:, column_index], **column_options)
                 col_data.attrs["sequence_index"] = column_index
                 col_data.attrs["target"] = col_data.name
                 physical_quantity = getattr(column, "physical_quantity", None)
@@ -183,6 +183,16 @@ class TestHeaderClass(unittest.TestCase):
         assert res.test6 is None
         assert res.asdict(res) == res.to_dict()
 
+    def test_user_data_without_tags(self):
+        # data types with explicit yaml tags are written without them
+        value = base.Person("Joe A. User", "Ivy League University")
+        value.u_bytes = b"abc"
+        value.u_set = {1, 2}
+        value.u_tuple = (1, 2)
+        output = value.to_yaml()
+        assert "!!" not in output
+        assert "u_bytes: |\n" in output
+
     def test_dict_conversion(self):
         res = base._todict({"a": "b"})
         assert res == {"a": "b"}
@@ -324,17 +334,50 @@ class TestValue(unittest.TestCase):
         value = base.Value.from_dict(dict(magnitude=13.4, my_attr="hallo ORSO"))
         assert value.user_data == {"my_attr": "hallo ORSO"}
 
+    def test_equality(self):
+        value = base.Value(1.0, "mm")
+        assert value == value
+        assert value.unit is base.Value(2.0, "".join(["m", "m"])).unit
+        assert value == base.Value(1.0, "mm")
+        assert value != base.Value(1.0, "m")
+        assert value != base.Value(1.0, "mm", offset=0.5)
+        assert value != base.Value(1.0, "mm", error=base.ErrorValue(0.1))
+        assert value != base.ComplexValue(1.0, None, "mm")
+        assert base.Value(1.0, "m", comment="a") != base.Value(1.0, "m", comment="b")
+
     def test_unit_conversion(self):
         base.unit_registry = None
         value = base.Value(1.0, "mm")
         assert value.as_unit("m") == 1.0e-3
         value = base.Value(1.0, "1/nm^3")
         assert value.as_unit("1/angstrom^3") == 1.0e-3
+        assert base._unit_factors[("mm", "m")] == 1.0e-3
+        value = base.Value(2.0, "mm")
+        assert value.as_unit("m") == 2.0e-3
 
         with self.assertRaises(pint.DimensionalityError):
             value = base.Value(1.0, "1/nm^3")
             value.as_unit("m")
 
+    def test_unit_conversion_offset(self):
+        # temperatures can't be converted by a factor alone
+        value = base.Value(300.0, "K")
+        self.assertAlmostEqual(value.as_unit("degC"), 26.85)
+        self.assertAlmostEqual(value.as_unit("degF"), 80.33)
+        self.assertAlmostEqual(value.as_unit("degC"), 26.85)
+        assert base._unit_factors[("K", "degC")] is None
+        # replacing the registry drops the cached factors, offset conversions still work
+        base.unit_registry = None
+        self.assertAlmostEqual(value.as_unit("degC"), 26.85)
+        base.unit_registry = pint.UnitRegistry()
+        self.assertAlmostEqual(value.as_unit("degF"), 80.33)
+        assert list(base._unit_factors) == [("K", "degF")]
+        self.assertAlmostEqual(base.Value(1.0, "K").as_unit("degC"), -272.15)
+        self.assertAlmostEqual(base.Value(1.0, "K").as_unit("mK"), 1000.0)
+        vmin, vmax = base.ValueRange(280.0, 300.0, "K").as_unit("degC")
+        self.assertAlmostEqual(vmin, 6.85)
+        self.assertAlmostEqual(vmax, 26.85)
+
 
 class TestComplexValue(unittest.TestCase):
     """
@@ -379,6 +422,14 @@ class TestComplexValue(unittest.TestCase):
         value = base.ComplexValue(None)
         assert value.to_yaml() == "{real: null}\n"
 
+    def test_equality(self):
+        value = base.ComplexValue(1.0, 2.0, "mm")
+        assert value == value
+        assert value == base.ComplexValue(1.0, 2.0, "mm")
+        assert value != base.ComplexValue(1.0, 3.0, "mm")
+        assert value != base.ComplexValue(1.0, 2.0, "mm", error=base.ErrorValue(0.1))
+        assert base.ComplexValue(1.0, 2.0, "m", comment="a") != base.ComplexValue(1.0, 2.0, "m", comment="b")
+
     def test_unit_conversion(self):
         base.unit_registry = None
         value = base.ComplexValue(1.0, 2.0, "mm")
@@ -707,9 +758,10 @@ class TestFile(unittest.TestCase):
         Creation for a file that does exist with a given modified date.
         """
         fname = Path(pth / "not_orso.ort")
-        value = base.File(str(fname.absolute()), datetime.fromtimestamp(fname.stat().st_mtime))
+        mtime = datetime.fromtimestamp(fname.stat().st_mtime)
+        value = base.File(str(fname.absolute()), mtime)
         assert value.file == str(fname)
-        assert value.timestamp == datetime.fromtimestamp(fname.stat().st_mtime)
+        assert value.timestamp == mtime
 
     def test_to_yaml_for_existing_file(self):
         """
@@ -717,13 +769,9 @@ class TestFile(unittest.TestCase):
         date.
         """
         fname = Path(pth / "not_orso.ort")
-        value = base.File(str(fname.absolute()), datetime.fromtimestamp(fname.stat().st_mtime))
-        assert (
-            value.to_yaml()
-            == f"file: {str(fname)}\n"
-            + "timestamp: "
-            + f"{datetime.fromtimestamp(fname.stat().st_mtime).isoformat()}\n"
-        )
+        mtime = datetime.fromtimestamp(fname.stat().st_mtime)
+        value = base.File(str(fname.absolute()), mtime)
+        assert value.to_yaml() == f"file: {str(fname)}\n" + "timestamp: " + f"{mtime.isoformat()}\n"
 
     def test_creation_for_existing_file_no_mod_time(self):
         """
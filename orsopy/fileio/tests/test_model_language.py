@@ -5,13 +5,29 @@ Tests for fileio.model_language module
 
 import unittest
 
+from copy import deepcopy
 from datetime import datetime
 from os.path import join as pjoin
+from types import SimpleNamespace
 
+import numpy as np
 import pytest
 
 from orsopy.fileio import ComplexValue, Value
 from orsopy.fileio import model_language as ml
+from orsopy.utils import resolver_slddb
+from orsopy.utils.chemical_formula import Formula
+from orsopy.utils.density_resolver import DensityResolver
+
+# model parameters shared by all tests, resolve_defaults only reads from it
+DEFAULTS = ml.ModelParameters(
+    mass_density_unit="g/cm^3",
+    number_density_unit="1/nm^3",
+    sld_unit="1/angstrom^2",
+    magnetic_moment_unit="muB",
+    length_unit="nm",
+    roughness=Value(0.3, "nm"),
+)
 
 
 class TestMaterial(unittest.TestCase):
@@ -25,12 +41,7 @@ class TestMaterial(unittest.TestCase):
         assert m.mass_density == Value(7.0, "g/cm^3")
 
     def test_default(self):
-        defaults = ml.ModelParameters(
-            mass_density_unit="g/cm^3",
-            number_density_unit="1/nm^3",
-            sld_unit="1/angstrom^2",
-            magnetic_moment_unit="muB",
-        )
+        defaults = DEFAULTS
         m = ml.Material(formula="Fe2O3", mass_density=7.0, number_density=0.15, sld=6.3e-6, magnetic_moment=3.4)
         m.resolve_defaults(defaults)
 
@@ -48,6 +59,14 @@ class TestMaterial(unittest.TestCase):
         )
         m.resolve_defaults(defaults)
 
+    def test_equality(self):
+        m = ml.Material(formula="Fe2O3", mass_density=Value(7.0, "g/cm^3"))
+        assert m == m
+        assert m == ml.Material(formula="Fe2O3", mass_density=Value(7.0, "g/cm^3"))
+        assert m != ml.Material(formula="Fe2O3", mass_density=Value(7.0, "g/cm^3"), relative_density=0.5)
+        assert m != ml.Material(formula="Fe2O3", mass_density=Value(7.0, "g/cm^3"), comment="other")
+        assert m != ml.Composit({"Fe2O3": 1.0})
+
     def test_density_lookup_elements(self):
         # no lookup case
         m = ml.Material(sld=Value(4e-6, "1/angstrom^3"))
@@ -68,18 +87,100 @@ class TestMaterial(unittest.TestCase):
             assert m.number_density is not None
             assert m.comment == "density from average element density from ORSO SLD db"
 
+    def test_density_lookup_failed(self):
+        class FailingResolver(DensityResolver):
+            calls = 0
+
+            def resolve_formula(self, formula):
+                self.calls += 1
+                raise ValueError("not found")
+
+            def resolve_elemental(self, formula):
+                raise ValueError("not found")
+
+        class FixedResolver(DensityResolver):
+            comment = "fixed density"
+            calls = 0
+
+            def resolve_formula(self, formula):
+                self.calls += 1
+                return 12.5
+
+            def resolve_elemental(self, formula):
+                raise ValueError("not found")
+
+        resolver = FailingResolver()
+        old_resolvers = list(ml.DENSITY_RESOLVERS)
+        ml.DENSITY_RESOLVERS[:] = [resolver]
+        ml._resolve_density.cache_clear()
+        try:
+            for i in range(3):
+                m = ml.Material(formula="Xe3Kr5")
+                m.generate_density()
+                assert m.number_density == Value(0.0, "1/nm^3")
+                assert m.comment == "could not locate density information for material"
+            # failed lookups are not cached
+            assert resolver.calls == 3
+
+            # a resolver added later is used for the formula, successful lookups are cached
+            fixed = FixedResolver()
+            ml.DENSITY_RESOLVERS.append(fixed)
+            for i in range(3):
+                m = ml.Material(formula="Xe3Kr5")
+                m.generate_density()
+                assert m.number_density == Value(12.5, "1/nm^3")
+                assert m.comment == "fixed density"
+            assert fixed.calls == 1
+
+            # formulas that can't be parsed are reported, not treated as unknown
+            with self.assertRaises(ValueError):
+                ml.Material(formula="Qq2").generate_density()
+        finally:
+            ml.DENSITY_RESOLVERS[:] = old_resolvers
+            ml._resolve_density.cache_clear()
+
+    def test_density_elemental_average(self):
+        class LocalAPI:
+            # elemental formula unit densities in 1/Å³
+            densities = {"Fe": 0.0849, "Ni": 0.0913}
+            searches = 0
+
+            def search(self, formula):
+                self.searches += 1
+                return [{"ID": formula}]
+
+            def material(self, ID):
+                return SimpleNamespace(fu_dens=self.densities[ID])
+
+        api = LocalAPI()
+        old_api = resolver_slddb.api
+        resolver_slddb.api = api
+        resolver_slddb._query_density.cache_clear()
+        try:
+            resolver = resolver_slddb.ResolverSLDDB()
+            # equal amounts, average of the element densities per atom in the formula unit
+            self.assertAlmostEqual(resolver.resolve_elemental(Formula("FeNi")), 1e3 * (0.0849 + 0.0913) / 4)
+            # amounts are used as weights
+            self.assertAlmostEqual(resolver.resolve_elemental(Formula("Fe3Ni")), 1e3 * (3 * 0.0849 + 0.0913) / 16)
+            # each element is only queried once
+            assert api.searches == 2
+        finally:
+            resolver_slddb.api = old_api
+            resolver_slddb._query_density.cache_clear()
+
     def test_sld(self):
         m = ml.Material(sld=ComplexValue(3.4e-6, -2e-6, "1/angstrom^2"))
         assert m.get_sld() == (3.4e-6 - 2e-6j)
-        m = ml.Material(formula="Si", mass_density=Value(2.33, "g/cm^3"))
-        self.assertAlmostEqual(m.get_sld().real, 2.07371e-6, 5)
-        self.assertAlmostEqual(m.get_sld().imag, -0.00002e-6, 5)
-        m = ml.Material(formula="Si", number_density=Value(0.04996026, "1/angstrom^3"))
-        self.assertAlmostEqual(m.get_sld().real, 2.07371e-6, 5)
-        self.assertAlmostEqual(m.get_sld().imag, -0.00002e-6, 5)
-        m = ml.Material(formula="Si", number_density=Value(49.96026, "1/nm^3"))
-        self.assertAlmostEqual(m.get_sld().real, 2.07371e-6, 5)
-        self.assertAlmostEqual(m.get_sld().imag, -0.00002e-6, 5)
+        materials = [
+            ml.Material(formula="Si", mass_density=Value(2.33, "g/cm^3")),
+            ml.Material(formula="Si", number_density=Value(0.04996026, "1/angstrom^3")),
+            ml.Material(formula="Si", number_density=Value(49.96026, "1/nm^3")),
+        ]
+        np.testing.assert_allclose([mi.get_sld() for mi in materials], 2.07371e-6 - 0.00002e-6j, rtol=1e-5)
+        hits = ml._formula_sld.cache_info().hits
+        m = ml.Material(formula="Si", mass_density=Value(2.33, "g/cm^3"), relative_density=0.5)
+        np.testing.assert_allclose(m.get_sld(), 0.5 * (2.07371e-6 - 0.00002e-6j), rtol=1e-5)
+        assert ml._formula_sld.cache_info().hits > hits
         m = ml.Material(formula="Si")
         assert m.get_sld() == (0.0j)
 
@@ -113,12 +214,7 @@ class TestComposit(unittest.TestCase):
             assert key in c._composition_materials
 
     def test_defaults(self):
-        defaults = ml.ModelParameters(
-            mass_density_unit="g/cm^3",
-            number_density_unit="1/nm^3",
-            sld_unit="1/angstrom^2",
-            magnetic_moment_unit="muB",
-        )
+        defaults = DEFAULTS
         materials = {
             "Si": ml.Material(formula="Fe2O3", mass_density=7.0, number_density=0.15, sld=6.3e-6, magnetic_moment=3.4)
         }
@@ -139,6 +235,21 @@ class TestComposit(unittest.TestCase):
 
         self.assertAlmostEqual(c.get_sld(), 1.0e-6)
 
+    def test_fraction_change(self):
+        materials = {
+            "A": ml.Material(sld=Value(1.0e-6, "1/angstrom^2")),
+            "B": ml.Material(sld=Value(3.0e-6, "1/angstrom^2")),
+        }
+        c = ml.Composit({"A": 0.5, "B": 0.5})
+        c.resolve_names(materials)
+        c.generate_density()
+        self.assertAlmostEqual(c.get_sld().real, 2.0e-6)
+        # fractions changed after resolving names are used for the mixing
+        c.composition["A"] = 0.9
+        c.composition["B"] = 0.1
+        c.generate_density()
+        self.assertAlmostEqual(c.get_sld().real, 1.2e-6)
+
     def test_to_yaml(self):
         c = ml.Composit({"air": 0.3, "water": 0.3, "Si": 0.2, "Co": 0.1})
         assert c.to_yaml() == "composition:\n  air: 0.3\n  water: 0.3\n  Si: 0.2\n  Co: 0.1\n"
@@ -184,13 +295,21 @@ class TestLayer(unittest.TestCase):
         lay.resolve_names({})
         assert lay.material.formula == "Si"
 
+    def test_fraction_change(self):
+        materials = {
+            "A": ml.Material(sld=Value(1.0e-6, "1/angstrom^2")),
+            "B": ml.Material(sld=Value(3.0e-6, "1/angstrom^2")),
+        }
+        lay = ml.Layer(composition={"A": 0.5, "B": 0.5})
+        lay.resolve_names(materials)
+        lay.composition["A"] = 0.9
+        lay.composition["B"] = 0.1
+        lay.generate_material()
+        self.assertAlmostEqual(lay.material.get_sld().real, 1.2e-6)
+        assert lay.material.comment == "composition material: 0.9xA;0.1xB"
+
     def test_defaults(self):
-        defaults = ml.ModelParameters(
-            mass_density_unit="g/cm^3",
-            number_density_unit="1/nm^3",
-            sld_unit="1/angstrom^2",
-            magnetic_moment_unit="muB",
-        )
+        defaults = DEFAULTS
 
         lay = ml.Layer(material=ml.Material(sld=2.0e-6))
         lay.resolve_defaults(defaults)
@@ -235,6 +354,19 @@ class TestSubStack(unittest.TestCase):
         with self.assertRaises(ValueError):
             empty.resolve_names({})
 
+    def test_parse_stack(self):
+        assert ml._parse_stack("air | 2( b 13 | c 5)|d 4.5") == (
+            ("layer", "air", 0.0),
+            ("sub_stack", "b 13 | c 5", 2),
+            ("layer", "d", 4.5),
+        )
+        assert ml._parse_stack("air | 2( b 13 | c 5)|d 4.5") is ml._parse_stack("air | 2( b 13 | c 5)|d 4.5")
+        assert ml._parse_stack("a|3(b|2(c|d))|e|") == (
+            ("layer", "a", 0.0),
+            ("sub_stack", "b|2(c|d)", 3),
+            ("layer", "e", 0.0),
+        )
+
     def test_resolution(self):
         s = ml.SubStack(stack="air | b 13 |c|d")
         resolvable_items = {
@@ -271,12 +403,7 @@ class TestSubStack(unittest.TestCase):
         ]
 
     def test_defaults(self):
-        defaults = ml.ModelParameters(
-            mass_density_unit="g/cm^3",
-            number_density_unit="1/nm^3",
-            sld_unit="1/angstrom^2",
-            magnetic_moment_unit="muB",
-        )
+        defaults = DEFAULTS
 
         s = ml.SubStack(sequence=[ml.Layer(thickness=13.0, material=ml.Material(formula="Co"))])
         s.resolve_defaults(defaults)
@@ -308,6 +435,34 @@ class TestSampleModel(unittest.TestCase):
         assert list(res.keys()) == ["a", "b", "c", "d"]
         assert list(res.values()) == [sub_stacks["a"], layers["b"], materials["c"], composits["d"]]
 
+        # items added in-place are found by the next resolve
+        sm.materials["e"] = ml.Material(sld=1.0)
+        assert sm.resolvable_items["e"] is sm.materials["e"]
+        sm.materials = {"f": ml.Material(sld=1.0)}
+        assert list(sm.resolvable_items.keys()) == ["a", "b", "f", "d"]
+
+    def test_resolve_added_material(self):
+        sm = ml.SampleModel(stack="b", materials={"a": ml.Material(sld=Value(1.0e-6, "1/angstrom^2"))})
+        sm.resolve_stack()
+        sm.materials["b"] = ml.Material(sld=Value(3.0e-6, "1/angstrom^2"))
+        layer = sm.resolve_stack()[0]
+        assert layer.material is sm.materials["b"]
+
+    def test_deepcopy(self):
+        sm = ml.SampleModel(
+            stack="c|a|c",
+            sub_stacks={"a": ml.SubStack(stack="c")},
+            materials={"c": ml.Material(sld=13.4)},
+            reference="test",
+        )
+        sm.user_value = [1, 2]
+        sm2 = deepcopy(sm)
+        assert sm2 == sm
+        assert sm2.materials["c"] is not sm.materials["c"]
+        assert sm2.user_value == [1, 2]
+        assert sm2.user_value is not sm.user_value
+        assert sm2.to_dict() == ml.SampleModel.from_dict(sm.to_dict()).to_dict()
+
     def test_duplicate_name(self):
         with pytest.warns(UserWarning):
             ml.SampleModel(
@@ -317,14 +472,7 @@ class TestSampleModel(unittest.TestCase):
             )
 
     def test_resolve_stack(self):
-        defaults = ml.ModelParameters(
-            mass_density_unit="g/cm^3",
-            number_density_unit="1/nm^3",
-            sld_unit="1/angstrom^2",
-            magnetic_moment_unit="muB",
-            length_unit="nm",
-            roughness=Value(0.3, "nm"),
-        )
+        defaults = DEFAULTS
 
         sub_stacks = {"a": ml.SubStack(stack="b")}
         layers = {"b": ml.Layer(thickness=13.4, material="c")}
@@ -361,14 +509,7 @@ class TestSampleModel(unittest.TestCase):
         )
 
     def test_resolve_to_layers(self):
-        defaults = ml.ModelParameters(
-            mass_density_unit="g/cm^3",
-            number_density_unit="1/nm^3",
-            sld_unit="1/angstrom^2",
-            magnetic_moment_unit="muB",
-            length_unit="nm",
-            roughness=Value(0.3, "nm"),
-        )
+        defaults = DEFAULTS
 
         sub_stacks = {"a": ml.SubStack(stack="b")}
         layers = {"b": ml.Layer(thickness=13.4, material="c"), "b2": ml.Layer(thickness=2.0, composition={"c": 1.0})}
@@ -2,27 +2,34 @@
 Tests for fileio module
 """
 
+import json
 import unittest
 
+from copy import copy, deepcopy
 from dataclasses import dataclass
 from datetime import datetime
-from io import BytesIO
+from io import BytesIO, StringIO
 from pathlib import Path
 
 import h5py
 import numpy as np
 import pytest
-import yaml
 
 from orsopy import fileio as fileio
 from orsopy.fileio.base import (Column, File, Header, ORSOSchemaWarning, Person, Value, ValueRange, _read_header_data,
-                                _validate_header_data)
+                                _validate_header_data, json_datetime_trap)
 from orsopy.fileio.data_source import DataSource, Experiment, InstrumentSettings, Measurement, Polarization, Sample
 from orsopy.fileio.orso import Orso, OrsoDataset
 from orsopy.fileio.reduction import Reduction, Software
 
 pth = Path(__file__).absolute().parent
 
+# tests that need an Orso header as starting point copy this instead of building a new one
+EMPTY_ORSO = Orso.empty()
+# data for the write/read tests, created once and protected against modification
+TEST_DATA = np.repeat(np.arange(100.0)[:, None], 3, axis=1)
+TEST_DATA.setflags(write=False)
+
 
 class TestOrso(unittest.TestCase):
     """
@@ -62,12 +69,8 @@ class TestOrso(unittest.TestCase):
         assert value.columns[1].name == "R"
         assert value.data_set == 0
 
-        h = value.to_yaml()
-        h = "\n".join(
-            ["# ORSO reflectivity data file | 0.1 standard | YAML encoding" " | https://www.reflectometry.org/", h]
-        )
-        g = yaml.safe_load_all(h)
-        _validate_header_data([next(g)])
+        # datetime objects have to be converted to str for the json schema, as the yaml dumper does
+        _validate_header_data([json.loads(json.dumps(value.to_dict(), default=json_datetime_trap))])
 
     def test_creation_data_set1(self):
         """
@@ -103,15 +106,14 @@ class TestOrso(unittest.TestCase):
         assert value.data_set == "1"
 
     def test_repr(self):
-        ds = fileio.Orso.empty()
+        ds = copy(EMPTY_ORSO)
         repr(ds)
 
     def test_write_read(self):
         # test write and read of multiple datasets
-        info = fileio.Orso.empty()
-        info2 = fileio.Orso.empty()
-        data = np.zeros((100, 3))
-        data[:] = np.arange(100.0)[:, None]
+        info = deepcopy(EMPTY_ORSO)
+        info2 = deepcopy(EMPTY_ORSO)
+        data = TEST_DATA
 
         info.columns = [
             fileio.Column("Qz", "1/angstrom"),
@@ -183,13 +185,38 @@ class TestOrso(unittest.TestCase):
             # test wrong data_separator characters
             fileio.save_orso([ds, ds2, ds3], "test.ort", data_separator="\na\n")
 
+    def test_write_read_compressed(self):
+        info = deepcopy(EMPTY_ORSO)
+        info.columns = [
+            fileio.Column("Qz", "1/angstrom"),
+            fileio.Column("R"),
+            fileio.ErrorColumn("R"),
+        ]
+        ds = fileio.OrsoDataset(info, TEST_DATA)
+
+        bio = BytesIO()
+        fileio.save_nexus([ds], bio, compression="gzip")
+        with h5py.File(bio, "r") as f:
+            col_data = f["0/data/Qz"]
+            assert col_data.compression == "gzip"
+            assert col_data.chunks is not None
+        (ls,) = fileio.load_nexus(bio)
+        assert ls == ds
+
+        # default stays contiguous and uncompressed
+        bio = BytesIO()
+        fileio.save_nexus([ds], bio)
+        with h5py.File(bio, "r") as f:
+            assert f["0/data/Qz"].compression is None
+            assert f["0/data/Qz"].chunks is None
+
     def test_unique_dataset(self):
         # checks that data_set is unique on saving of OrsoDatasets
-        info = Orso.empty()
+        info = deepcopy(EMPTY_ORSO)
         info.data_set = 0
         info.columns = [Column("stuff")] * 4
 
-        info2 = Orso.empty()
+        info2 = deepcopy(EMPTY_ORSO)
         info2.data_set = 0
         info2.columns = [Column("stuff")] * 4
 
@@ -204,21 +231,22 @@ class TestOrso(unittest.TestCase):
 
     def test_user_data(self):
         # test write and read of userdata
-        info = fileio.Orso.empty()
+        info = deepcopy(EMPTY_ORSO)
         info.columns = [
             fileio.Column("Qz", "1/angstrom"),
             fileio.Column("R"),
             fileio.ErrorColumn("R"),
         ]
 
-        data = np.zeros((100, 3))
-        data[:] = np.arange(100.0)[:, None]
+        data = TEST_DATA
         info.ci = 1
         info.foo = ["bar", 1, 2, 3.4]
         ds = fileio.OrsoDataset(info, data)
 
-        fileio.save_orso([ds], "test2.ort")
-        ls = fileio.load_orso("test2.ort")
+        sio = StringIO()
+        fileio.save_orso([ds], sio)
+        sio.seek(0)
+        ls = fileio.load_orso(sio)
         assert ls[0].info.user_data == info.user_data
 
         # create from dictionary
@@ -227,8 +255,10 @@ class TestOrso(unittest.TestCase):
 
         # user data in sub-key
         info.data_source.test_entry = "test"
-        fileio.save_orso([ds], "test2.ort")
-        ls = fileio.load_orso("test2.ort")
+        sio = StringIO()
+        fileio.save_orso([ds], sio)
+        sio.seek(0)
+        ls = fileio.load_orso(sio)
         assert ls[0].info.user_data == info.user_data
 
         # create with keyword argument
@@ -247,19 +277,22 @@ class TestOrso(unittest.TestCase):
         assert hasattr(info.data_source.measurement.instrument_settings.incident_angle, "resolution")
 
     def test_save_numpy_scalar_dtypes(self):
-        info = fileio.Orso.empty()
+        info = deepcopy(EMPTY_ORSO)
         info.data_source.measurement.instrument_settings.wavelength = Value(np.float64(10.0))
         info.data_source.measurement.instrument_settings.incident_angle = Value(np.int32(2))
         ds = fileio.orso.OrsoDataset(info, np.arange(20.0).reshape(10, 2))
         # .ort test:
-        fileio.save_orso([ds], "test_numpy.ort")
-        ls = fileio.load_orso("test_numpy.ort")
+        sio = StringIO()
+        fileio.save_orso([ds], sio)
+        sio.seek(0)
+        ls = fileio.load_orso(sio)
         i_s = ls[0].info.data_source.measurement.instrument_settings
         assert i_s.wavelength.magnitude == 10.0
         assert i_s.incident_angle.magnitude == 2
         # .orb test:
-        fileio.save_nexus([ds], "test_numpy.orb")
-        ln = fileio.load_nexus("test_numpy.orb")
+        bio = BytesIO()
+        fileio.save_nexus([ds], bio)
+        ln = fileio.load_nexus(bio)
         i_n = ln[0].info.data_source.measurement.instrument_settings
         assert i_n.wavelength.magnitude == 10.0
         assert i_n.incident_angle.magnitude == 2
@@ -323,6 +356,11 @@ class TestFunctions(unittest.TestCase):
         assert empty.data_set is None
         dct = empty.to_dict()
         _validate_header_data([dct])
+        # each call returns an independent object
+        empty2 = Orso.empty()
+        assert empty2 == empty
+        assert empty2.columns is not empty.columns
+        assert empty2.data_source.measurement is not ds.measurement
 
     def test_empty_to_yaml(self):
         """
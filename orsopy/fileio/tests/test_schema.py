@@ -9,16 +9,14 @@ import numpy as np
 import yaml
 
 from orsopy import fileio
-from orsopy.fileio.base import _read_header_data, _validate_header_data
+from orsopy.fileio.base import _load_refl_schema, _parse_data_lines, _read_header_data, _validate_header_data
 
 pth = Path(__file__).absolute().parent
 
 
 class TestSchema(unittest.TestCase):
     def test_example_ort(self):
-        schema_pth = pth / ".." / "schema" / "refl_header.schema.json"
-        with open(schema_pth, "r") as f:
-            schema = json.load(f)
+        schema = _load_refl_schema()
 
         dct_list, data, version = _read_header_data(pth / "test_example.ort", validate=True)
         assert data[0].shape == (2, 4)
@@ -37,9 +35,27 @@ class TestSchema(unittest.TestCase):
         assert data[1].shape == (4, 4)
         np.testing.assert_allclose(data[1][2:], data[0])
 
+    def test_header_timestamps_as_str(self):
+        # the header loader (libyaml when available) keeps dates as strings
+        dct_list, data, version = _read_header_data(pth / "test_example.ort")
+        assert dct_list[0]["data_source"]["experiment"]["start_date"] == "2021-05-12"
+
+    def test_parse_data_lines(self):
+        lines = ["1.0 2.0 3.0\n", "4.0\t5.0  6.0\n"]
+        np.testing.assert_array_equal(_parse_data_lines(lines), [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+        assert _parse_data_lines([]).shape == (0,)
+        # lines that don't form a table are converted one by one, as before
+        with self.assertRaises(ValueError):
+            _parse_data_lines(["1.0 2.0 3.0\n", "4.0 5.0\n", "6.0\n"])
+        # ragged lines with a total that matches a regular table
+        with self.assertRaises(ValueError):
+            _parse_data_lines(["1 2 3\n", "4 5\n", "6 7 8 9\n"])
+
     def test_empty_ort(self):
         test = fileio.Orso.empty()
         _validate_header_data([test.to_dict()])
+        # the schema file is only parsed once
+        assert _load_refl_schema() is _load_refl_schema()
 
     def test_wrong_schema(self):
         vi = sys.version_info
@@ -1,13 +1,27 @@
 import sys
 
-from .fileio import load_nexus, save_orso
+from concurrent.futures import ProcessPoolExecutor
+
+
+def convert(fn):
+    # importing fileio is slow (numpy, yaml), only do it when there is a file to convert
+    from .fileio import load_nexus, save_orso
+
+    res = load_nexus(fn)
+    save_orso(res, fn.rsplit(".", 1)[0] + ".ort")
+    return fn
 
 
 def main():
-    for fn in sys.argv[1:]:
-        print(fn)
-        res = load_nexus(fn)
-        save_orso(res, fn.rsplit(".", 1)[0] + ".ort")
+    if len(sys.argv) < 3:
+        for fn in sys.argv[1:]:
+            print(fn)
+            convert(fn)
+        return
+    # files are independent, use processes as yaml parsing holds the GIL and h5py serializes all HDF5 calls
+    with ProcessPoolExecutor() as executor:
+        for fn in executor.map(convert, sys.argv[1:]):
+            print(fn)
 
 
 if __name__ == "__main__":
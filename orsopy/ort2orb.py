@@ -1,13 +1,27 @@
 import sys
 
-from .fileio import load_orso, save_nexus
+from concurrent.futures import ProcessPoolExecutor
+
+
+def convert(fn):
+    # importing fileio is slow (numpy, yaml), only do it when there is a file to convert
+    from .fileio import load_orso, save_nexus
+
+    res = load_orso(fn)
+    save_nexus(res, fn.rsplit(".", 1)[0] + ".orb")
+    return fn
 
 
 def main():
-    for fn in sys.argv[1:]:
-        print(fn)
-        res = load_orso(fn)
-        save_nexus(res, fn.rsplit(".", 1)[0] + ".orb")
+    if len(sys.argv) < 3:
+        for fn in sys.argv[1:]:
+            print(fn)
+            convert(fn)
+        return
+    # files are independent, use processes as yaml parsing holds the GIL and h5py serializes all HDF5 calls
+    with ProcessPoolExecutor() as executor:
+        for fn in executor.map(convert, sys.argv[1:]):
+            print(fn)
 
 
 if __name__ == "__main__":
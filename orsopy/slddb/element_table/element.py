@@ -4,7 +4,7 @@ Defining the Element class that is used to hold all needed data for one element/
 
 import os
 
-from numpy import array, load
+from numpy import array, asarray, empty, full, load, nan, searchsorted, zeros
 
 from .masses import ATOMIC_WEIGHTS, ELEMENT_CHARGES, ELEMENT_FULLNAMES
 from .nabs_geant4 import DATA_DIR as NABS_DATA_DIR
@@ -69,20 +69,41 @@ class Element:
         if self._xdata is None:
             return float("nan")
         E, fp, fpp = self._xdata
-        fltr = E >= Ei
-        if not fltr.any():
+        # the energy table is sorted, locate the first point with E >= Ei
+        idx = searchsorted(E, Ei)
+        if idx == len(E):
             return 0.0 - 0j
-        else:
-            # linear interpolation between two nearest points
-            E1 = E[fltr][0]
-            try:
-                E2 = E[fltr][1]
-            except IndexError:
-                return fp[fltr][0] - 1j * fpp[fltr][0]
-            else:
-                f1 = fp[fltr][0] - 1j * fpp[fltr][0]
-                f2 = fp[fltr][1] - 1j * fpp[fltr][1]
-                return ((E2 - Ei) * f1 + (Ei - E1) * f2) / (E2 - E1)
+        f1 = fp[idx] - 1j * fpp[idx]
+        if idx + 1 == len(E):
+            return f1
+        # linear interpolation between two nearest points
+        E1 = E[idx]
+        E2 = E[idx + 1]
+        f2 = fp[idx + 1] - 1j * fpp[idx + 1]
+        return ((E2 - Ei) * f1 + (Ei - E1) * f2) / (E2 - E1)
+
+    def f_of_E_array(self, E):
+        """
+        Scattering factor for an array of energies, same interpolation as f_of_E.
+        """
+        E = asarray(E, dtype=float)
+        if self._xdata is None:
+            return full(E.shape, nan, dtype=complex)
+        Et, fp, fpp = self._xdata
+        f = fp - 1j * fpp
+        idx = searchsorted(Et, E)
+        # points beyond the table are 0
+        out = zeros(E.shape, dtype=complex)
+        out[idx == len(Et) - 1] = f[-1]
+        inner = idx < len(Et) - 1
+        i1 = idx[inner]
+        i2 = i1 + 1
+        Ei = E[inner]
+        E1 = Et[i1]
+        E2 = Et[i2]
+        # linear interpolation between two nearest points
+        out[inner] = ((E2 - Ei) * f[i1] + (Ei - E1) * f[i2]) / (E2 - E1)
+        return out
 
     def b_of_L(self, Li):
         if self._ndata is None:
@@ -92,17 +113,39 @@ class Element:
             return self.b.real - 1j * b_abs[-1]
         if Li < L[0]:
             return self.b.real - 1j * b_abs[0]
-        fltr = L >= Li
+        # the wavelength table is sorted, locate the first point with L >= Li
+        idx = searchsorted(L, Li)
+        if idx + 1 == len(L):
+            return self.b.real - 1j * b_abs[idx]
         # linear interpolation between two nearest points
-        L1 = L[fltr][0]
-        try:
-            L2 = L[fltr][1]
-        except IndexError:
-            return self.b.real - 1j * b_abs[fltr][0]
-        else:
-            b_abs1 = b_abs[fltr][0]
-            b_abs2 = b_abs[fltr][1]
-            return self.b.real - 1j * ((L2 - Li) * b_abs1 + (Li - L1) * b_abs2) / (L2 - L1)
+        L1 = L[idx]
+        L2 = L[idx + 1]
+        return self.b.real - 1j * ((L2 - Li) * b_abs[idx] + (Li - L1) * b_abs[idx + 1]) / (L2 - L1)
+
+    def b_of_L_array(self, L):
+        """
+        Scattering length for an array of wavelengths, same interpolation as b_of_L.
+        """
+        L = asarray(L, dtype=float)
+        if self._ndata is None:
+            return full(L.shape, self.b, dtype=complex)
+        Lt, b_abs = self._ndata
+        idx = searchsorted(Lt, L)
+        absorption = empty(L.shape)
+        # points outside the table use the closest value
+        above = L > Lt[-1]
+        below = L < Lt[0]
+        absorption[above | ((idx == len(Lt) - 1) & ~below)] = b_abs[-1]
+        absorption[below] = b_abs[0]
+        inner = ~below & (idx < len(Lt) - 1)
+        i1 = idx[inner]
+        i2 = i1 + 1
+        Li = L[inner]
+        L1 = Lt[i1]
+        L2 = Lt[i2]
+        # linear interpolation between two nearest points
+        absorption[inner] = ((L2 - Li) * b_abs[i1] + (Li - L1) * b_abs[i2]) / (L2 - L1)
+        return self.b.real - 1j * absorption
 
     @property
     def E(self):
@@ -3,7 +3,9 @@ Class to hold information for one material and allow calculation
 of x-ray and neutron SLDs for different applications.
 """
 
-from numpy import array, pi
+from functools import cached_property
+
+from numpy import array, pi, zeros
 
 from ..utils.chemical_formula import Formula
 from .constants import (Cu_kalpha, E_to_lambda, Mo_kalpha, dens_D2O, dens_H2O, fm2angstrom, muB, r_e, r_e_angstrom,
@@ -11,6 +13,7 @@ from .constants import (Cu_kalpha, E_to_lambda, Mo_kalpha, dens_D2O, dens_H2O, f
 from .element_table import get_element
 
 SUBSCRIPT_DIGITS = "₀₁₂₃₄₅₆₇₈₉"
+SUBSCRIPT_TABLE = str.maketrans("0123456789", SUBSCRIPT_DIGITS)
 
 
 class PolymerSequence(str):
@@ -31,6 +34,9 @@ class Material:
     roh_m: Å^{-2}
     mu: muB/FU
     M: kA/m = emu/cm³
+
+    The elements are not supposed to change after creation, quantities
+    derived from them only (fu_mass, fu_b, has_ndata, formula) are cached.
     """
 
     def __init__(
@@ -131,32 +137,41 @@ class Material:
 
     def rho_vs_E(self):
         # generate full energy range data for E,SLD
+        # energies of the first element within the range covered by all elements
+        Emin = max(element.E.min() for element, number in self.elements)
+        Emax = min(element.E.max() for element, number in self.elements)
         E = self.elements[0][0].E
+        E = E[(E >= Emin) & (E <= Emax)]
+        f = zeros(E.shape, dtype=complex)
         for element, number in self.elements:
-            E = E[(E >= element.E.min()) & (E <= element.E.max())]
-        rho = array([self.rho_of_E(Ei) for Ei in E])
+            f += number * element.f_of_E_array(E)
+        rho = f * r_e * self.fu_dens * fm2angstrom  # Å^-2
         return E, rho
 
-    def delta_vs_E(self):
+    def _xray_vs_E(self):
+        # calculate delta, beta and mu from a single rho_vs_E evaluation
         E, rho = self.rho_vs_E()
         lamda = E_to_lambda / E
-        return E, lamda ** 2 / 2.0 / pi * rho.real
+        factor = lamda ** 2 / 2.0 / pi
+        return E, factor * rho.real, -factor * rho.imag, -lamda * 2.0 * rho.imag
+
+    def delta_vs_E(self):
+        E, delta, beta, mu = self._xray_vs_E()
+        return E, delta
 
     def beta_vs_E(self):
-        E, rho = self.rho_vs_E()
-        lamda = E_to_lambda / E
-        return E, -(lamda ** 2) / 2.0 / pi * rho.imag
+        E, delta, beta, mu = self._xray_vs_E()
+        return E, beta
 
     def mu_vs_E(self):
-        E, rho = self.rho_vs_E()
-        lamda = E_to_lambda / E
-        return E, -lamda * 2.0 * rho.imag
+        E, delta, beta, mu = self._xray_vs_E()
+        return E, mu
 
     @property
     def dens(self):
         return self.fu_mass * u2g * self.fu_dens * 1e24  # g/cm³
 
-    @property
+    @cached_property
     def fu_mass(self):
         m = 0.0
         for element, number in self.elements:
@@ -165,14 +180,14 @@ class Material:
             m += number * element.mass
         return m
 
-    @property
+    @cached_property
     def fu_b(self):
         b = 0.0
         for element, number in self.elements:
             b += number * element.b
         return b
 
-    @property
+    @cached_property
     def has_ndata(self):
         return any([element.has_ndata for element, number in self.elements])
 
@@ -193,39 +208,40 @@ class Material:
             return array([0.05, 50.0]), array([b0, b0])
 
         L = [el for el, n in self.elements if el.has_ndata][0].Lamda
-        b = array([self.b_of_L(Li) for Li in L])
+        b = zeros(L.shape, dtype=complex)
+        for element, number in self.elements:
+            b += number * element.b_of_L_array(L)
         return L, b
 
     def rho_n_vs_L(self):
         L, b = self.b_vs_L()
         return L, b * self.fu_dens * fm2angstrom
 
-    @property
-    def formula(self):
+    @cached_property
+    def _formula_string(self):
         output = ""
         for element, number in self.elements:
             output += element.symbol + str(number)
-        return Formula(output)
+        return output
+
+    @property
+    def formula(self):
+        # Formula is mutable, return a new one each time
+        return Formula(self._formula_string)
 
     @staticmethod
     def convert_subscript(number):
         if number == 1.0:
             return ""
         nstr = str(number)
-        out = ""
-        for digit in nstr:
-            if digit == ".":
-                if number.is_integer():
-                    break
-                out += "."
-            else:
-                out += SUBSCRIPT_DIGITS[int(digit)]
-        return out
+        if "." in nstr and number.is_integer():
+            nstr = nstr[: nstr.index(".")]
+        return nstr.translate(SUBSCRIPT_TABLE)
 
     @property
     def deuterated(self):
         # returns a copy of this material with all hydrogens replaced by deuterium but same fu_volume
-        dformula = Formula(self.formula)
+        dformula = self.formula
         if "H" in dformula:
             Hidx = dformula.index("H")
             dformula[Hidx] = ("D", dformula[Hidx][1])
@@ -250,7 +266,7 @@ class Material:
     @property
     def edeuterated(self):
         # returns a copy of this material with all non-exchangable hydrogens replaced by deuterium but same fu_volume
-        dformula = Formula(self.formula)
+        dformula = self.formula
         if "H" in dformula:
             Hidx = dformula.index("H")
             dformula[Hidx] = ("D", dformula[Hidx][1])
@@ -264,7 +280,7 @@ class Material:
     @property
     def exchanged(self):
         # returns a copy of this material with all Hx replaced by deuterium but same fu_volume
-        eformula = Formula(self.formula)
+        eformula = self.formula
         if "Hx" in eformula:
             Hidx = eformula.index("Hx")
             eformula[Hidx] = ("D", eformula[Hidx][1])
@@ -278,7 +294,7 @@ class Material:
     @property
     def not_exchanged(self):
         # returns a copy of this material with all Hx replaced by normal hydrogen but same fu_volume
-        eformula = Formula(self.formula)
+        eformula = self.formula
         if "Hx" in eformula:
             Hidx = eformula.index("Hx")
             eformula[Hidx] = ("H", eformula[Hidx][1])
@@ -289,14 +305,21 @@ class Material:
             dname = "e" + self.name
         return Material(eformula, fu_dens=self.fu_dens, name=dname, extra_data=self.extra_data)
 
+    @cached_property
+    def _exchange_basis(self):
+        # formulas used by exchange(), they only depend on the elements
+        h_formula = self.not_exchanged.formula
+        exchange_diff = self.exchanged.formula - h_formula
+        return h_formula, self.deuterated.formula, exchange_diff
+
     def exchange(self, D_fraction, D2O_fraction, exchange=0.9):
         """
         Return a partially deuterated modlecule within H2O/D2O solution given amount of exchange.
         """
+        h_formula, d_formula, exchange_diff = self._exchange_basis
         # fractionally deuterated molecule without Hx
-        hd = (1.0 - D_fraction) * self.not_exchanged.formula + D_fraction * self.deuterated.formula
+        hd = (1.0 - D_fraction) * h_formula + D_fraction * d_formula
         # fully exchanged molecule
-        exchange_diff = self.exchanged.formula - self.not_exchanged.formula
         exh2o = hd - D_fraction * exchange_diff
         exd2o = hd - (D_fraction - 1.0) * exchange_diff
         # partial exchanged molecule
@@ -357,8 +380,7 @@ class Material:
             out["beta_Cu_kalpha"] = self.beta_of_E(Cu_kalpha)
             out["delta_Mo_kalpha"] = self.delta_of_E(Mo_kalpha)
             out["beta_Mo_kalpha"] = self.beta_of_E(Mo_kalpha)
-            E, delta = self.delta_vs_E()
-            E, beta = self.beta_vs_E()
+            E, delta, beta, mu = self._xray_vs_E()
             out["xray_E"] = E.tolist()
             out["xray_delta"] = delta.tolist()
             out["xray_beta"] = beta.tolist()
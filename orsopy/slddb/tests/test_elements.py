@@ -55,3 +55,10 @@ class TestFormula(unittest.TestCase):
         self.assertEqual(type(e1.fpp), np.ndarray)
         self.assertEqual(type(e1.f_of_E(8.0)), np.complex128)
         self.assertTrue(np.isnan(e2.f_of_E(8.0)))
+        E = np.array([1e-3, e1.E[5], 8.0, e1.E[-1], 1e10])
+        np.testing.assert_allclose(e1.f_of_E_array(E), [e1.f_of_E(Ei) for Ei in E], rtol=1e-14)
+        self.assertTrue(np.isnan(e2.f_of_E_array(E)).all())
+        e3 = element_table.get_element("Gd")
+        L = np.array([0.0, e3.Lamda[0], 1.798, e3.Lamda[-2], e3.Lamda[-1], 1000.0])
+        np.testing.assert_allclose(e3.b_of_L_array(L), [e3.b_of_L(Li) for Li in L], rtol=1e-14)
+        np.testing.assert_array_equal(e1.b_of_L_array(L), e1.b)
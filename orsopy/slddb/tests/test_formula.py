@@ -27,6 +27,14 @@ class TestFormula(unittest.TestCase):
         self.assertEqual(Formula("(BO2)3Cr(H2O)2"), Formula("Cr1B3O8H4"))
         self.assertEqual(Formula("(BO2)3 Cr (H2O)2"), Formula("Cr1B3O8H4"))
 
+    def test_cached_parse(self):
+        f1 = Formula("Fe2O3")
+        f1[0] = ("Co", 2.0)
+        f2 = Formula("Fe2O3")
+        self.assertEqual(f2, Formula("Fe2 O3"))
+        self.assertEqual(f2.HR_formula, "Fe2O3")
+        self.assertNotEqual(f1, f2)
+
     def test_invalid(self):
         with self.assertRaises(ValueError):
             Formula("z")
@@ -59,6 +59,10 @@ class TestMaterial(unittest.TestCase):
         m1 = Material([(Element("Ni"), 1.0)], xsld=REFERENCE_RESULTS["Ni"][2], xE=Mo_kalpha)
         self.assertEqual(str(m1.formula), "Ni")
         self.assertEqual(m1.formula, Formula([("Ni", 1.0)]))
+        # the formula is cached, but modifying the returned object must not change the material
+        f = m1.formula
+        f.append(("O", 1.0))
+        self.assertEqual(m1.formula, Formula([("Ni", 1.0)]))
 
     def test_creation(self):
         Material([(Element("Ni"), 1.0)], dens=1.0)
@@ -250,6 +254,11 @@ class TestMaterial(unittest.TestCase):
         self.assertEqual(m4.formula, m3.exchanged.formula)
         self.assertAlmostEqual(m3a.not_exchanged.fu_dens, m1.fu_dens)
         self.assertAlmostEqual(m3a.exchanged.fu_dens, m1.fu_dens)
+        # repeated calls use the cached basis formulas and must not alter them
+        m5 = Material("HHxO", fu_dens=m1.fu_dens)
+        self.assertEqual(m5.exchange(0.0, 0.0, exchange=1.0).formula, m1.formula)
+        self.assertEqual(m5.exchange(0.0, 1.0, exchange=1.0).formula, m4.formula)
+        self.assertEqual(m5.exchange(0.0, 0.0, exchange=1.0).formula, m1.formula)
 
     def test_match_point(self):
         m1 = Material("H2O", dens=1.0)
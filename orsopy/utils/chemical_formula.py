@@ -3,8 +3,10 @@ A simple class to resolve and store chemical formula strings.
 """
 
 import re
+import sys
 
 from collections import OrderedDict
+from functools import lru_cache
 
 
 class Formula(list):
@@ -38,9 +40,7 @@ class Formula(list):
         else:
             self._do_sort = sort
             self.HR_formula = string
-            list.__init__(self, [])
-            self.parse_string(string)
-            self.merge_same()
+            list.__init__(self, _parse_formula(string, sort))
 
     def parse_string(self, string):
         # remove gaps and ignored characters
@@ -66,16 +66,17 @@ class Formula(list):
         end = start
         if start > 0:
             out.append((string[:start], 1.0))
+        # searches start at the current position, so the string is only scanned once
         while end < len(string):
-            end = start + string[start:].find(")")
-            _next = end + 1
+            end = string.find(")", start)
             if end < start:
                 raise ValueError("Brackets need to be closed")
+            _next = end + 1
             while not (_next == len(string) or string[_next].isalpha() or string[_next] == "("):
                 _next += 1
-            block = string[start + 1 : end]
-            if "(" in block:
+            if string.find("(", start + 1, end) != -1:
                 raise ValueError("Only one level of brackets is allowed")
+            block = string[start + 1 : end]
             number = string[end + 1 : _next]
             if number == "":
                 out.append((block, 1.0))
@@ -83,11 +84,11 @@ class Formula(list):
                 out.append((block, float(number)))
             if _next == len(string):
                 break
-            if "(" not in string[_next:]:
+            start = string.find("(", _next)
+            if start == -1:
                 out.append((string[_next:], 1.0))
                 break
             else:
-                start = _next + string[_next:].index("(")
                 end = start
                 if start > _next:
                     out.append((string[_next:start], 1.0))
@@ -95,41 +96,25 @@ class Formula(list):
 
     def parse_group(self, group, case_sensitive=True):
         if case_sensitive:
-            flags = 0
+            tokens = _SYMBOLS_RE
         else:
-            flags = re.IGNORECASE
+            tokens = _SYMBOLS_RE_I
         out = []
-        mele = re.search(self.elements, group, flags=flags)
-        miso = re.search(self.isotopes, group, flags=flags)
-        if miso is not None and miso.start() == mele.start():
-            prev = miso
-        else:
-            prev = mele
-        if prev is None or prev.start() != 0:
-            raise ValueError("Did not find any valid element in string")
-        pos = prev.end()
-        while pos < len(group):
-            mele = re.search(self.elements, group[pos:], flags=flags)
-            miso = re.search(self.isotopes, group[pos:], flags=flags)
-            if miso is not None and miso.start() == mele.start():
-                _next = miso
-            else:
-                _next = mele
-            if _next is None:
+        prev = None
+        # the text between two element symbols is the amount of the first one
+        for match in tokens.finditer(group):
+            if prev is not None:
+                amount = group[prev.end() : match.start()]
+                out.append((prev.group().capitalize(), float(amount) if amount else 1.0))
+            elif match.start() != 0:
                 break
-            if _next.start() == 0:
-                out.append((prev.string[prev.start() : prev.end()].capitalize(), 1.0))
-            else:
-                out.append(
-                    (prev.string[prev.start() : prev.end()].capitalize(), float(group[pos : pos + _next.start()]))
-                )
-            prev = _next
-            pos += _next.end()
-        if pos == len(group):
-            out.append((prev.string[prev.start() :].capitalize(), 1.0))
-        else:
-            out.append((prev.string[prev.start() : prev.end()].capitalize(), float(group[pos:])))
-        return out
+            prev = match
+        if prev is None:
+            raise ValueError("Did not find any valid element in string")
+        amount = group[prev.end() :]
+        out.append((prev.group().capitalize(), float(amount) if amount else 1.0))
+        # element symbols are used as dictionary keys for the element lookup
+        return [(sys.intern(element), amount) for element, amount in out]
 
     def merge_same(self):
         elements = OrderedDict({})
@@ -176,3 +161,21 @@ class Formula(list):
 
     def __rmul__(self, other):
         return self * other
+
+
+# element symbols for Formula.parse_group, isotopes take precedence over the plain element at the same position
+_SYMBOLS_RE = re.compile(f"(?:{Formula.isotopes})|(?:{Formula.elements})")
+_SYMBOLS_RE_I = re.compile(f"(?:{Formula.isotopes})|(?:{Formula.elements})", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def _parse_formula(string, sort=True):
+    """
+    Parse a formula string to a tuple of (element, amount) items.
+
+    The result is cached by input string, Formula instances get a copy as they are mutable.
+    """
+    formula = Formula([], sort=sort)
+    formula.parse_string(string)
+    formula.merge_same()
+    return tuple(formula)
@@ -2,31 +2,51 @@
 Implementation of DensityResolver using SLD DB queries.
 """
 
+from functools import lru_cache
+from typing import Optional, Tuple
+
 from ..slddb import api
 from .chemical_formula import Formula
 from .density_resolver import DensityResolver
 
 
+@lru_cache(maxsize=512)
+def _query_density(formula: str) -> Optional[Tuple[int, float]]:
+    """
+    Search the SLD DB for a formula and return ID and formula unit density (1/Å³) of the first match.
+
+    Results are cached by formula string, as the same materials and elements are requested
+    for many layers and each query can be a web request.
+    """
+    res = api.search(formula=formula)
+    if len(res) == 0:
+        return None
+    ID = res[0]["ID"]
+    return ID, api.material(ID).fu_dens
+
+
 class ResolverSLDDB(DensityResolver):
     comment = ""
 
     def resolve_formula(self, formula: Formula) -> float:
-        res = api.search(formula=formula)
-        if len(res) > 0:
-            m = api.material(res[0]["ID"])
-            self.comment = f"density from ORSO SLD db ID={res[0]['ID']}"
-            return 1e3 * m.fu_dens
+        res = _query_density(str(formula))
+        if res is not None:
+            ID, fu_dens = res
+            self.comment = f"density from ORSO SLD db ID={ID}"
+            return 1e3 * fu_dens
         else:
             raise ValueError(f"Could not find material {formula}")
 
     def resolve_elemental(self, formula: Formula) -> float:
         n = 0.0
         dens = 0.0
-        for i in range(len(formula)):
-            res = api.search(formula=formula[i][0])
-            m = api.material(res[0]["ID"])
-            n += formula[i][1]
-            dens += 1e3 * m.fu_dens
-        dens /= n * len(formula)
+        for element, amount in formula:
+            res = _query_density(element)
+            if res is None:
+                raise ValueError(f"Could not find element {element}")
+            n += amount
+            dens += amount * 1e3 * res[1]
+        # average atom density weighted by amount, divided by the number of atoms per formula unit
+        dens /= n * n
         self.comment = "density from average element density from ORSO SLD db"
         return dens